@@ -1,24 +1,139 @@
-from flask import Flask, jsonify, request, render_template_string
-import networkx as nx
+from flask import Flask, Response, request
 import time
 import threading
-import copy
-import os
+import functools
+import hashlib
+from collections import defaultdict
+import itertools
+import sys
+import math
+import numpy as np
+from numba import njit
+import orjson
 
 app = Flask(__name__)
 
+# orjson encodes numpy scalars/arrays natively, so store values can be returned as-is
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY
+
+def json_response(payload):
+    """orjson-backed stand-in for flask.jsonify."""
+    return Response(orjson.dumps(payload, option=ORJSON_OPTIONS), mimetype='application/json')
+
 SAFETY_MARGIN_METERS = 200
 # Acceleration applied per tick (km/h per simulation tick). User requested 10 km/h^2
 # Here we interpret this as 10 km/h increase per tick (tick is 1 second in this simulation).
 ACCELERATION_KMH_PER_TICK = 10.0
 
+
+class TrainStore:
+    """Struct-of-Arrays store for the trains on the corridor.
+
+    Every physics field lives in its own preallocated NumPy column so the
+    simulation tick can update all trains with whole-array operations. Only
+    the first `count` rows of each column are live; `id_to_idx` maps a train
+    ID to its row.
+    """
+
+    FIELDS = ('position_km', 'speed_kmh', 'target_speed_kmh', 'max_speed_kmh',
+              'braking_rate', 'priority', 'dispatched')
+
+    def __init__(self, capacity=16):
+        self.ids = []
+        self.id_to_idx = {}
+        self.count = 0
+        self.position_km = np.zeros(capacity)
+        self.speed_kmh = np.zeros(capacity)
+        self.target_speed_kmh = np.zeros(capacity)
+        self.max_speed_kmh = np.zeros(capacity)
+        self.braking_rate = np.ones(capacity)
+        self.priority = np.zeros(capacity, dtype=np.int64)
+        self.dispatched = np.zeros(capacity, dtype=bool)
+        # Scratch buffer the tick kernel writes the position ordering into
+        self.order = np.zeros(capacity, dtype=np.int64)
+
+    def __contains__(self, train_id):
+        return train_id in self.id_to_idx
+
+    def __len__(self):
+        return self.count
+
+    def keys(self):
+        return self.id_to_idx.keys()
+
+    def add(self, train):
+        """Append a train (a dict with 'id' plus every name in FIELDS) as a new row."""
+        if self.count == len(self.position_km):
+            # Out of room: double every column. Rows past `count` are never read.
+            new_capacity = 2 * len(self.position_km)
+            for field in self.FIELDS + ('order',):
+                setattr(self, field, np.resize(getattr(self, field), new_capacity))
+        idx = self.count
+        for field in self.FIELDS:
+            getattr(self, field)[idx] = train[field]
+        self.ids.append(train['id'])
+        self.id_to_idx[train['id']] = idx
+        # Keep order[:count] a permutation; the kernel re-sorts it if out of place
+        self.order[idx] = idx
+        self.count += 1
+
+    def is_dispatched(self, train_id):
+        return bool(self.dispatched[self.id_to_idx[train_id]])
+
+    def dispatch(self, train_id):
+        self.dispatched[self.id_to_idx[train_id]] = True
+
+    def to_dict(self):
+        """Return the trains as plain `{id: {field: value}}` dicts (JSON friendly)."""
+        columns = [getattr(self, field)[:self.count].tolist() for field in self.FIELDS]
+        return {
+            train_id: dict(zip(('id',) + self.FIELDS, (train_id,) + row))
+            for train_id, row in zip(self.ids, zip(*columns))
+        }
+
+    def values(self):
+        return self.to_dict().values()
+
+
 simulation_state = {
-    'trains': {},
+    'trains': TrainStore(),
     'occupied_tracks': []
 }
 
+# Guards simulation_state; only writers (the tick, dispatcher, add_train) take it
 state_lock = threading.Lock()
 
+# Last numeric suffix add_train handed out for each ID prefix; guarded by state_lock
+_suffix_counters = defaultdict(int)
+
+# Read-only copy of simulation_state, rebuilt by every writer. Readers pick up the
+# current reference without locking; swapping a module global is atomic.
+# _published_state_json is the same snapshot pre-encoded for /api/state, with its ETag.
+_published_state = None
+_published_state_json = None
+
+def _publish_state():
+    """Replace the published snapshot from simulation_state. Call with state_lock held.
+
+    The JSON is encoded here, once per change, rather than on every /api/state
+    request; doing it under the lock keeps concurrent writers from publishing
+    out of order.
+    """
+    global _published_state, _published_state_json
+    state = {
+        'trains': simulation_state['trains'].to_dict(),
+        'occupied_tracks': list(simulation_state['occupied_tracks'])
+    }
+    body = orjson.dumps(state, option=ORJSON_OPTIONS)
+    _published_state = state
+    _published_state_json = (body, hashlib.md5(body).hexdigest())
+
+_publish_state()
+
+def _snapshot():
+    """Latest published state; shared between readers, so it must not be mutated."""
+    return _published_state
+
 track_data = {
     'nodes': [
         ("Ballari Junction", {"type": "station"}), ("Signal_BLR_1", {"type": "signal"}),
@@ -37,99 +152,256 @@ track_data = {
     ]
 }
 
+BLOCKED_TRACK_COST = 9999.0
+
+class RailwayGraph:
+    """Undirected track graph in CSR form, so Dijkstra can run as a Numba kernel.
+
+    Node i's neighbours are `indices[indptr[i]:indptr[i + 1]]`, and `edge_of`
+    gives the edge index of each of those slots. Costs live per edge in
+    `weights` (current, traffic-adjusted) and `base_weights` (unblocked).
+    """
+
+    def __init__(self, nodes, edges):
+        self.node_ids = [name for name, _ in nodes]
+        self.name_to_idx = {name: i for i, name in enumerate(self.node_ids)}
+        self.edge_index = {frozenset((u, v)): e for e, (u, v, _) in enumerate(edges)}
+        self.base_weights = np.array([float(data.get('base_time_mins', 20)) for _, _, data in edges])
+        self.weights = self.base_weights.copy()
+        # Edge indices currently carrying BLOCKED_TRACK_COST in `weights`
+        self.blocked_edges = set()
+
+        adjacency = [[] for _ in self.node_ids]
+        for e, (u, v, _) in enumerate(edges):
+            adjacency[self.name_to_idx[u]].append((self.name_to_idx[v], e))
+            adjacency[self.name_to_idx[v]].append((self.name_to_idx[u], e))
+        self.indptr = np.cumsum([0] + [len(neighbours) for neighbours in adjacency]).astype(np.int64)
+        self.indices = np.array([v for neighbours in adjacency for v, _ in neighbours], dtype=np.int64)
+        self.edge_of = np.array([e for neighbours in adjacency for _, e in neighbours], dtype=np.int64)
+
+    def edges(self):
+        return self.edge_index.keys()
+
+    @property
+    def nodes(self):
+        return self.node_ids
+
 def create_railway_graph():
-    G = nx.Graph()
-    G.add_nodes_from(track_data['nodes'])
-    G.add_edges_from(track_data['edges'])
-    for u, v, data in G.edges(data=True):
-        data['time_cost'] = data.get('base_time_mins', 20)
-    return G
+    return RailwayGraph(track_data['nodes'], track_data['edges'])
+
+@njit(cache=True, nogil=True)
+def dijkstra(indptr, indices, edge_of, weights, src):
+    """Single-source shortest paths; returns each node's predecessor (-1 if none)."""
+    n = indptr.shape[0] - 1
+    dist = np.full(n, np.inf)
+    pred = np.full(n, -1, dtype=np.int64)
+    done = np.zeros(n, dtype=np.bool_)
+    dist[src] = 0.0
+    for _ in range(n):
+        # Linear scan for the closest open node: cheaper than a heap at this size
+        u = -1
+        best = np.inf
+        for v in range(n):
+            if not done[v] and dist[v] < best:
+                best = dist[v]
+                u = v
+        if u == -1:
+            break
+        done[u] = True
+        for k in range(indptr[u], indptr[u + 1]):
+            v = indices[k]
+            candidate = dist[u] + weights[edge_of[k]]
+            if candidate < dist[v]:
+                dist[v] = candidate
+                pred[v] = u
+    return pred
+
+def _path_from_predecessors(graph, pred, src, dst):
+    if src != dst and pred[dst] == -1:
+        return None
+    path = [dst]
+    while path[-1] != src:
+        path.append(pred[path[-1]])
+    return [graph.node_ids[i] for i in reversed(path)]
 
 def find_optimal_path(graph, start_node, end_node):
-    try:
-        return nx.astar_path(graph, start_node, end_node, weight="time_cost")
-    except nx.NetworkXNoPath:
-        return None
+    src, dst = graph.name_to_idx[start_node], graph.name_to_idx[end_node]
+    pred = dijkstra(graph.indptr, graph.indices, graph.edge_of, graph.weights, src)
+    return _path_from_predecessors(graph, pred, src, dst)
 
-def update_graph_with_traffic(graph, current_state):
-    for u, v, data in graph.edges(data=True):
-        cost = data.get('base_time_mins', 20)
-        if (u, v) in current_state['occupied_tracks'] or (v, u) in current_state['occupied_tracks']:
-            cost = 9999
-        graph[u][v]['time_cost'] = cost
+# The topology is static, so the graph is built once and only its edge costs change
+RAILWAY_MAP = create_railway_graph()
+graph_lock = threading.Lock()
 
+def update_graph_with_traffic(graph, current_state):
+    occupied = current_state['occupied_tracks']
+    if not occupied and not graph.blocked_edges:
+        # Common case: nothing blocked now or last time, so the weights are already base
+        return
+    blocked = {graph.edge_index[track] for track in map(frozenset, occupied) if track in graph.edge_index}
+    for e in graph.blocked_edges - blocked:
+        graph.weights[e] = graph.base_weights[e]
+    for e in blocked - graph.blocked_edges:
+        graph.weights[e] = BLOCKED_TRACK_COST
+    graph.blocked_edges = blocked
+
+@functools.lru_cache(maxsize=1024)
+def _cached_path(start_node, end_node, blocked_tracks):
+    """Route for one (start, end, blocked-edge set) key; blocked_tracks is a
+    frozenset of frozenset edges so the key is hashable and direction-agnostic."""
+    with graph_lock:
+        update_graph_with_traffic(RAILWAY_MAP, {'occupied_tracks': blocked_tracks})
+        return find_optimal_path(RAILWAY_MAP, start_node, end_node)
+
+# Above this many edges the 2^|E| blocking configurations are too many to enumerate
+# up front, and routes are only computed (and memoized) on demand
+PATH_TABLE_MAX_EDGES = 10
+
+def build_path_table(graph):
+    """Precompute the route for every (start, end, blocked-edge set) combination.
+
+    Keys match those of _cached_path. Returns an empty table when the graph is too
+    large to enumerate (see PATH_TABLE_MAX_EDGES).
+    """
+    edges = [frozenset(edge) for edge in graph.edges()]
+    if len(edges) > PATH_TABLE_MAX_EDGES:
+        return {}
+
+    table = {}
+    with graph_lock:
+        for r in range(len(edges) + 1):
+            for blocked in itertools.combinations(edges, r):
+                blocked = frozenset(blocked)
+                update_graph_with_traffic(graph, {'occupied_tracks': blocked})
+                # One Dijkstra per source yields the routes to every destination at once
+                for src, start_node in enumerate(graph.nodes):
+                    pred = dijkstra(graph.indptr, graph.indices, graph.edge_of, graph.weights, src)
+                    for dst, end_node in enumerate(graph.nodes):
+                        table[(start_node, end_node, blocked)] = _path_from_predecessors(graph, pred, src, dst)
+        update_graph_with_traffic(graph, {'occupied_tracks': []})
+    return table
+
+PATH_TABLE = build_path_table(RAILWAY_MAP)
+
+# v^2 / 2a with v given in km/h: (v / 3.6)^2 / (2a) == v^2 / (2 * 3.6^2 * a)
+BRAKING_DISTANCE_FACTOR = 2 * 3.6 ** 2
+
+@njit(cache=True, nogil=True)
 def calculate_braking_distance(speed_kmh, braking_rate=0.8):
-    speed_mps = speed_kmh / 3.6
-    return (speed_mps ** 2) / (2 * braking_rate)
+    return (speed_kmh * speed_kmh) / (BRAKING_DISTANCE_FACTOR * braking_rate)
+
+@njit(cache=True, nogil=True)
+def calculate_dynamic_speed_limit(following_pos_km, following_braking_rate, following_max_speed_kmh,
+                                  ahead_pos_km, ahead_speed_kmh, ahead_braking_rate, margin_meters):
+    braking_distance_ahead = calculate_braking_distance(ahead_speed_kmh, ahead_braking_rate)
+    safe_point_meters = ahead_pos_km * 1000 - braking_distance_ahead - margin_meters
+    distance_to_safe_point = safe_point_meters - (following_pos_km * 1000)
 
-def calculate_dynamic_speed_limit(following_train, train_ahead):
-    braking_distance_ahead = calculate_braking_distance(train_ahead['speed_kmh'], train_ahead['braking_rate'])
-    safe_point_meters = train_ahead['position_km'] * 1000 - braking_distance_ahead - SAFETY_MARGIN_METERS
-    distance_to_safe_point = safe_point_meters - (following_train['position_km'] * 1000)
-    
     if distance_to_safe_point <= 0:
-        return 0
-        
-    safe_speed_mps = (2 * distance_to_safe_point * following_train['braking_rate']) ** 0.5
+        return 0.0
+
+    safe_speed_mps = math.sqrt(2 * distance_to_safe_point * following_braking_rate)
     safe_speed_kmh = safe_speed_mps * 3.6
-    return min(safe_speed_kmh, following_train['max_speed_kmh'])
+    return min(safe_speed_kmh, following_max_speed_kmh)
+
+@njit(cache=True, nogil=True)
+def _ensure_sorted(pos, order):
+    """Insertion-sort `order` in place by (position, row), i.e. a stable argsort of `pos`.
+
+    Between ticks trains move a few metres and rarely overtake, so `order` is
+    nearly sorted: this costs one linear pass plus a short shift per overtaking
+    train, instead of a full O(n log n) re-sort whenever anything is out of place.
+    """
+    for k in range(1, order.shape[0]):
+        i = order[k]
+        m = k - 1
+        while m >= 0 and (pos[order[m]] > pos[i] or (pos[order[m]] == pos[i] and order[m] > i)):
+            order[m + 1] = order[m]
+            m -= 1
+        order[m + 1] = i
+
+@njit(cache=True, nogil=True)
+def tick_update(pos, speed, max_speed, brake, dispatched, order_out, tick_s, accel, margin):
+    """Advance every train by one tick, updating `speed` and `pos` in place.
+
+    The arrays are the live TrainStore columns; `order_out` holds the indices of
+    the trains sorted by position, so element k+1 is the train directly ahead of
+    element k. It is carried over from the previous tick, re-sorted only when
+    stale, and on return reflects the positions after the move.
+
+    Like the other kernels it is compiled with nogil=True: it releases the GIL
+    while running, so Flask worker threads are not stalled by the physics. The
+    columns are protected by state_lock, which the caller holds, not by the GIL.
+    """
+    n = pos.shape[0]
+    _ensure_sorted(pos, order_out)
+
+    for k in range(n):
+        i = order_out[k]
+        # Allow trains to accelerate up to their configured maximum speed, unless
+        # the braking envelope of the train ahead imposes a more restrictive limit
+        safe_speed_limit = max_speed[i]
+        if k + 1 < n:
+            j = order_out[k + 1]
+            safe_speed_limit = min(safe_speed_limit, calculate_dynamic_speed_limit(
+                pos[i], brake[i], max_speed[i], pos[j], speed[j], brake[j], margin))
+
+        # Branchless: accelerate by `accel` only when at or under the limit, otherwise
+        # brake straight down to it; trains not yet dispatched are held at 0
+        speed[i] = min(safe_speed_limit, speed[i] + accel * (safe_speed_limit >= speed[i])) * dispatched[i]
+
+    for i in range(n):
+        pos[i] += speed[i] * (tick_s / 3600.0) * dispatched[i]
+    _ensure_sorted(pos, order_out)
+
+def _warm_up_kernels():
+    """Compile (or load from the on-disk cache) the jitted kernels with the exact
+    argument types used at runtime, so the first real tick doesn't stall."""
+    pos, speed = np.array([0.0, 1.0]), np.zeros(2)
+    tick_update(pos, speed, np.ones(2), np.ones(2), np.ones(2, dtype=bool),
+                np.arange(2, dtype=np.int64), 1.0, ACCELERATION_KMH_PER_TICK, float(SAFETY_MARGIN_METERS))
+    calculate_braking_distance(speed, np.ones(2))
+
+_warm_up_kernels()
 
 def simulation_loop():
     TICK_RATE_SECONDS = 1.0
 
+    # Ticks are scheduled against the monotonic clock so time spent doing the work
+    # doesn't accumulate as drift, and positions integrate the real elapsed time.
+    last_tick = time.monotonic() - TICK_RATE_SECONDS
+    next_tick = last_tick + TICK_RATE_SECONDS
     while True:
+        now = time.monotonic()
+        dt = now - last_tick
+        last_tick = now
         with state_lock:
-            sorted_trains = sorted(simulation_state['trains'].values(), key=lambda t: t['position_km'])
-
-            # --- (Inside simulation_loop) ---
-            for i, current_train in enumerate(sorted_trains):
-                train_ahead = None 
-                if i + 1 < len(sorted_trains):
-                    train_ahead = sorted_trains[i+1]
-
-                # If the train is not yet dispatched, it must stay stopped
-                if not current_train.get('dispatched', False):
-                    current_train['speed_kmh'] = 0.0
-                    continue
-
-                # Default desired limit: allow trains to accelerate up to their configured maximum speed
-                desired_limit = current_train.get('max_speed_kmh', current_train.get('target_speed_kmh', 0))
-
-                # If there's a train ahead, calculate a more restrictive speed limit
-                safe_speed_limit = desired_limit
-                if train_ahead:
-                    safe_speed_limit = min(safe_speed_limit, calculate_dynamic_speed_limit(current_train, train_ahead))
-
-                # Now, apply acceleration or braking based on the final calculated limit
-                if safe_speed_limit < current_train['speed_kmh']:
-                    # Brake immediately for safety (braking rate unchanged)
-                    current_train['speed_kmh'] = safe_speed_limit
-                else:
-                    # Accelerate towards the speed limit using configured acceleration per tick
-                    current_train['speed_kmh'] = min(safe_speed_limit, current_train['speed_kmh'] + ACCELERATION_KMH_PER_TICK)
-
-            for train_id, train in simulation_state['trains'].items():
-                # Only update position if the train has been dispatched; safety: undispatched trains should remain at start
-                if not train.get('dispatched', False):
-                    continue
-                distance_moved_km = train['speed_kmh'] * (TICK_RATE_SECONDS / 3600)
-                train['position_km'] += distance_moved_km
-
-            sorted_trains_after_update = sorted(simulation_state['trains'].values(), key=lambda t: t['position_km'])
-            for i in range(len(sorted_trains_after_update) - 1):
-                following_train = sorted_trains_after_update[i]
-                train_ahead = sorted_trains_after_update[i+1]
-
-                braking_dist_ahead_meters = calculate_braking_distance(train_ahead['speed_kmh'], train_ahead['braking_rate'])
-                total_safety_bubble_meters = braking_dist_ahead_meters + SAFETY_MARGIN_METERS
-
-                actual_distance_meters = (train_ahead['position_km'] - following_train['position_km']) * 1000
-
-                if actual_distance_meters < total_safety_bubble_meters:
-                    print(f"🔴 SAFETY ALERT: {following_train['id']} has breached the safety bubble of {train_ahead['id']}!")
-                    print(f"   > Required Distance: {total_safety_bubble_meters:.2f}m, Actual Distance: {actual_distance_meters:.2f}m")
-            display_simulation(simulation_state) # This will draw the updated state
-        time.sleep(TICK_RATE_SECONDS)
+            trains = simulation_state['trains']
+            n = trains.count
+            pos = trains.position_km[:n]
+            speed = trains.speed_kmh[:n]
+            brake = trains.braking_rate[:n]
+            tick_update(pos, speed, trains.max_speed_kmh[:n], brake, trains.dispatched[:n],
+                        trains.order[:n], dt, ACCELERATION_KMH_PER_TICK, float(SAFETY_MARGIN_METERS))
+
+            # The kernel leaves trains.order sorted by the updated positions
+            order = trains.order[:n]
+            pos_s, speed_s, brake_s = pos[order], speed[order], brake[order]
+            total_safety_bubble_meters = calculate_braking_distance(speed_s[1:], brake_s[1:]) + SAFETY_MARGIN_METERS
+            actual_distance_meters = (pos_s[1:] - pos_s[:-1]) * 1000
+            for i in np.where(actual_distance_meters < total_safety_bubble_meters)[0]:
+                following_id, ahead_id = trains.ids[order[i]], trains.ids[order[i + 1]]
+                print(f"🔴 SAFETY ALERT: {following_id} has breached the safety bubble of {ahead_id}!")
+                print(f"   > Required Distance: {total_safety_bubble_meters[i]:.2f}m, Actual Distance: {actual_distance_meters[i]:.2f}m")
+            _publish_state()
+
+        next_tick += TICK_RATE_SECONDS
+        remaining = next_tick - time.monotonic()
+        if remaining < -TICK_RATE_SECONDS:
+            # Fell more than a whole tick behind (e.g. process stalled): resync rather than burst
+            next_tick = time.monotonic()
+            remaining = 0
+        time.sleep(max(0, remaining))
 
 
 def display_simulation(state):
@@ -141,8 +413,8 @@ def display_simulation(state):
     TOTAL_TRACK_KM = 10.0            # The total length of the railway in km this represents (reduced to 10 km)
 
     # --- Clear the screen ---
-    # 'nt' is for Windows, 'posix' is for Mac/Linux
-    os.system('cls' if os.name == 'nt' else 'clear')
+    # ANSI cursor-home + erase-display; avoids spawning a 'clear'/'cls' subprocess per frame
+    sys.stdout.write("\033[H\033[2J")
 
     print("--- RAILWAY TRAFFIC CONTROL SIMULATION ---")
     print(f"Ballari Control Room - {time.strftime('%H:%M:%S')}")
@@ -177,6 +449,14 @@ def display_simulation(state):
         print(f"  > {train['id']}: \t Pos: {train['position_km']:.2f} km | Speed: {train['speed_kmh']:.2f} km/h")
 
 
+def display_loop(refresh_seconds=0.5):
+    """Redraws the terminal view from a state snapshot, off the simulation thread
+    so rendering never delays a tick or an API request."""
+    while True:
+        display_simulation(_snapshot())
+        time.sleep(refresh_seconds)
+
+
 def dispatcher_loop(dispatch_sequence, delay_between_dispatches=2.0):
     """Marks trains as dispatched in the exact order provided, ignoring priority.
     dispatch_sequence is a list of train IDs in the order they should be released.
@@ -184,8 +464,10 @@ def dispatcher_loop(dispatch_sequence, delay_between_dispatches=2.0):
     # Dispatch each train in order exactly once
     for i, tid in enumerate(dispatch_sequence):
         with state_lock:
-            if tid in simulation_state['trains'] and not simulation_state['trains'][tid].get('dispatched', False):
-                simulation_state['trains'][tid]['dispatched'] = True
+            trains = simulation_state['trains']
+            if tid in trains and not trains.is_dispatched(tid):
+                trains.dispatch(tid)
+                _publish_state()
                 print(f"[DISPATCH] Train {tid} dispatched at {time.strftime('%H:%M:%S')}")
         # Sleep after dispatching unless it's the last one
         if i < len(dispatch_sequence) - 1:
@@ -197,8 +479,11 @@ def home():
 
 @app.route("/api/state")
 def get_current_state():
-    with state_lock:
-        return jsonify(copy.deepcopy(simulation_state))
+    body, etag = _published_state_json
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    # Answers 304 Not Modified when the client's If-None-Match is still current
+    return response.make_conditional(request)
 
 
 @app.route('/api/add_train', methods=['POST'])
@@ -224,13 +509,13 @@ def add_train():
     # Generate an ID if not provided
     base = (data.get('id') or f"{category.capitalize()}_")
     with state_lock:
-        # find a unique numeric suffix
-        suffix = 1
-        candidate = base + str(suffix)
-        existing = set(simulation_state['trains'].keys())
-        while candidate in existing:
-            suffix += 1
-            candidate = base + str(suffix)
+        # next numeric suffix for this prefix; trains are never removed, so every lower one is taken
+        _suffix_counters[base] += 1
+        candidate = base + str(_suffix_counters[base])
+        # a caller-supplied id can still collide (e.g. id 'Goods_1' -> 'Goods_11'): probe past it
+        while candidate in simulation_state['trains']:
+            _suffix_counters[base] += 1
+            candidate = base + str(_suffix_counters[base])
 
         new_train = {
             'id': candidate,
@@ -244,18 +529,20 @@ def add_train():
             'dispatched': True
         }
 
-        simulation_state['trains'][candidate] = new_train
+        simulation_state['trains'].add(new_train)
+        _publish_state()
 
-    return jsonify({'status': 'ok', 'train_id': candidate, 'train': new_train})
+    return json_response({'status': 'ok', 'train_id': candidate, 'train': new_train})
 
 @app.route("/api/path/<string:start_node>/<string:end_node>")
 def get_path(start_node, end_node):
-    with state_lock:
-        current_state = copy.deepcopy(simulation_state)
+    current_state = _snapshot()
 
-    railway_map = create_railway_graph()
-    update_graph_with_traffic(railway_map, current_state)
-    path = find_optimal_path(railway_map, start_node, end_node)
+    key = (start_node, end_node, frozenset(frozenset(track) for track in current_state['occupied_tracks']))
+    if key in PATH_TABLE:
+        path = PATH_TABLE[key]
+    else:
+        path = _cached_path(*key)
     
     result = {
         "start_node": start_node,
@@ -263,14 +550,14 @@ def get_path(start_node, end_node):
         "optimal_path": path,
         "blocked_tracks_at_moment": current_state["occupied_tracks"]
     }
-    return jsonify(result)
+    return json_response(result)
 
 
 
-@app.route("/viewer")
-def viewer():
-    # This HTML is now much more advanced, with CSS for styling and JS for rendering the state.
-    return render_template_string("""
+# This HTML is now much more advanced, with CSS for styling and JS for rendering the state.
+# It is fully static (the clock is filled in by updateClock() on load), so it is
+# served as-is rather than rendered as a template on every request.
+VIEWER_HTML = """
     <!DOCTYPE html>
     <html>
     <head>
@@ -300,7 +587,7 @@ def viewer():
     </head>
     <body>
         <h1>🚂 Railway Simulation Viewer</h1>
-        <p>Live from Ballari Control Room - <span id="clock">{{ time_str }}</span></p>
+        <p>Live from Ballari Control Room - <span id="clock"></span></p>
 
         <div class="container">
             <h2>Live Track</h2>
@@ -420,13 +707,21 @@ def viewer():
         </script>
     </body>
     </html>
-    """, time_str=time.strftime('%H:%M:%S')) # Pass current time for initial load
+    """
+
+@app.route("/viewer")
+def viewer():
+    return VIEWER_HTML
 
 if __name__ == "__main__":
     # Start simulation thread
     simulation_thread = threading.Thread(target=simulation_loop, daemon=True)
     simulation_thread.start()
 
+    # Terminal view at 2 Hz on its own thread
+    display_thread = threading.Thread(target=display_loop, args=(0.5,), daemon=True)
+    display_thread.start()
+
     # Dispatch sequence requested by user (ignore priority):
     # 1.express, 2.local, 3.local, 4.goods, 5.express, 6.goods, 7.goods
     dispatch_sequence = [